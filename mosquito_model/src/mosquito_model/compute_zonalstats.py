@@ -54,10 +54,9 @@ def compute_zonalstats(raster, vector, feat):
     raster_file_dir = raster
     rasters = []
     for root, dirs, files in os.walk(raster_file_dir):
-        path = os.path.join(*root.split(os.sep))
         for file in files:
             if '.tif' in file:
-                raster_path = os.path.join(path, file)
+                raster_path = os.path.join(root, file)
                 rasters.append(raster_path)
 
     shapefile = vector#r'C:\Users\JMargutti\OneDrive - Rode Kruis\Rode Kruis\ERA\shapefiles\phl_admbnda_adm2_psa_namria_20200529.shp'
@@ -69,7 +68,7 @@ def compute_zonalstats(raster, vector, feat):
     df_final = pd.DataFrame(index=pd.MultiIndex.from_product([adm_divisions], names=['adm_division']))
 
     for raster_path in rasters:
-        dir_col = raster_path.split('.')[1]
+        dir_col = os.path.basename(raster_path).split('.')[1]
         # print('processing', dir_col)
 
         df_final[dir_col] = np.nan
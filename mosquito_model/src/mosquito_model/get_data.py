@@ -7,40 +7,59 @@ import ee
 from geetools import batch
 from geetools import tools
 from country_bounding_boxes import country_subunits_by_iso_code
+from mosquito_model.raster_archive import lookup_raster, store_raster
 import os
 import datetime
 today = datetime.date.today()
 start_date = datetime.date.today() + datetime.timedelta(-30)
 import time
+import shutil
 import logging
 
 
-def get_data(country_iso_code, datestart, dateend, dest, collection, variable):
+def get_raster_dir(dest, collection, variable, datestart, dateend):
+    """
+    this function returns the directory to which get_data downloads the rasters
+    of the given collection, variable and date range.
+    """
+    if not isinstance(datestart, str):
+        datestart = datestart.strftime('%Y-%m-%d')
+        dateend = dateend.strftime('%Y-%m-%d')
+    collection_dir = collection.replace('/', '_')
+    folder = dest + '/' + collection_dir + '_' + variable
+    name = variable + '_' + datestart + '_' + dateend
+    return folder + '/' + name
 
-    # define bounding box of the Philippines
-    bbox_coords = [c.bbox for c in country_subunits_by_iso_code(country_iso_code)][0]
-    bounding_box = ee.Geometry.Rectangle(list(bbox_coords))
-    output_dir = dest
+
+def get_data(country_iso_code, datestart, dateend, dest, collection, variable, archive=None, storeraster=False):
 
     # get list of dates from given date range
     if not isinstance(datestart, str):
         datestart = datestart.strftime('%Y-%m-%d')
         dateend = dateend.strftime('%Y-%m-%d')
 
+    # read from local raster archive, if available
+    archived_raster = lookup_raster(archive, collection, variable, datestart, dateend, country_iso_code)
+    if archived_raster is not None:
+        logging.info(f'found {variable} {datestart} {dateend} in raster archive')
+        return archived_raster
+
+    # define bounding box of the Philippines
+    bbox_coords = [c.bbox for c in country_subunits_by_iso_code(country_iso_code)][0]
+    bounding_box = ee.Geometry.Rectangle(list(bbox_coords))
+    output_dir = dest
+
     if not os.path.exists(output_dir):
         os.mkdir(output_dir)
-    collection_dir = collection.replace('/', '_')
-    folder = output_dir + '/' + collection_dir + '_' + variable
+    file_name = get_raster_dir(output_dir, collection, variable, datestart, dateend)
+    folder = os.path.dirname(file_name)
     if not os.path.exists(folder):
         os.mkdir(folder)
 
-    # convert datetime objects to strings
-    name = variable + '_' + datestart + '_' + dateend
-    file_name = folder + '/' + name
-
     if os.path.exists(file_name):
-        logging.error('found existing', name, ', skipping')
-        return file_name
+        logging.info(f'found existing {file_name}, skipping download')
+        return archive_raster(file_name, archive, storeraster, collection, variable, datestart, dateend,
+                              country_iso_code)
 
     # get ImageCollection within given dates and bounding box
     try:
@@ -99,4 +118,20 @@ def get_data(country_iso_code, datestart, dateend, dest, collection, variable):
                             region=bounding_box)
     except FileExistsError:
         pass
-    return file_name
+
+    return archive_raster(file_name, archive, storeraster, collection, variable, datestart, dateend,
+                          country_iso_code)
+
+
+def archive_raster(file_name, archive, storeraster, collection, variable, datestart, dateend, country_iso_code):
+    """
+    this function moves the rasters in file_name to the local raster archive, if storeraster is set,
+    and returns where the rasters can be read from.
+    """
+    if archive is None or not storeraster:
+        return file_name
+    archived_raster = store_raster(archive, file_name, collection, variable, datestart, dateend, country_iso_code)
+    if archived_raster is None:
+        return file_name
+    shutil.rmtree(file_name)
+    return archived_raster
@@ -4,7 +4,7 @@ Author: Jacopo Margutti (jmargutti@redcross.nl)
 Date: 22-03-2021
 """
 import pandas as pd
-from mosquito_model.get_data import get_data
+from mosquito_model.get_data import get_data, get_raster_dir
 from mosquito_model.compute_zonalstats import compute_zonalstats
 from mosquito_model.compute_risk import compute_risk
 from mosquito_model.compute_suitability import compute_suitability
@@ -17,7 +17,6 @@ import ee
 import click
 import json
 import shutil
-from pathlib import Path
 import requests
 from dotenv import load_dotenv
 import errno
@@ -86,11 +85,13 @@ input_data = [
 @click.option('--predictstart', default=datetime.date.today().strftime("%Y-%m-%d"),
               help='start predictions from date (%Y-%m-%d)')
 @click.option('--predictend', default=None, help='end predictions on date (%Y-%m-%d)')
-@click.option('--storeraster', is_flag=True, help='store raster data locally')
+@click.option('--storeraster', is_flag=True, help='store raster data in the local raster archive')
+@click.option('--rasterarchive', default=None,
+              help='raster archive directory, always read if present (default: <data>/raster_archive, \'\' to disable)')
 @click.option('--noemail', is_flag=True, help='do not send email alert')
 @click.option('--verbose', is_flag=True, help='print output at each step')
 def main(countrycode, vector, temperaturesuitability, thresholds, demographics, credentials, admincode,
-         data, dest, predictstart, predictend, storeraster, noemail, verbose):
+         data, dest, predictstart, predictend, storeraster, rasterarchive, noemail, verbose):
 
     # initialize GEE
     gee_credentials = os.path.join(credentials, 'era-service-account-credentials.json')
@@ -119,6 +120,10 @@ def main(countrycode, vector, temperaturesuitability, thresholds, demographics,
     # define input/output directories
     os.makedirs(data, exist_ok=True)
     os.makedirs(dest, exist_ok=True)
+    if rasterarchive is None:
+        rasterarchive = os.path.join(data, 'raster_archive')
+    elif rasterarchive == '':
+        rasterarchive = None
     processed_data = os.path.join(dest, 'data_aggregated.csv')
     predictions_data = os.path.join(dest, 'predictions.csv')
 
@@ -136,12 +141,14 @@ def main(countrycode, vector, temperaturesuitability, thresholds, demographics,
         # get raw data, compute zonal statistics and save processed data
         for data_tuple in input_data:
             logging.info(f"starting collection {data_tuple[0]} {data_tuple[1]}")
-            raster_data = ''
             for start_date, end_date in zip(start_dates, end_dates):
                 # get raw data
+                download_dir = get_raster_dir(data, data_tuple[0], data_tuple[1], start_date, end_date)
+                downloaded = not os.path.exists(download_dir)
                 try:
                     raster_data = func_timeout(600, get_data,
-                                               args=(countrycode, start_date, end_date, data, data_tuple[0], data_tuple[1]))
+                                               args=(countrycode, start_date, end_date, data, data_tuple[0], data_tuple[1],
+                                                     rasterarchive, storeraster))
                 except FunctionTimedOut:
                     logging.error(f"PIPELINE ERROR : TIMEOUT DOWNLOADING {data_tuple[0]} {data_tuple[1]}")
                     exit(0)
@@ -159,9 +166,9 @@ def main(countrycode, vector, temperaturesuitability, thresholds, demographics,
                         df_data_processed.at[(row['adm_division'], start_date.year, start_date.month), data_tuple[1]] = row['mean']
                     else:
                         logging.error('NO DATA AT', data_tuple, start_date, end_date)
-            # remove raster data
-            if not storeraster:
-                shutil.rmtree(Path(raster_data).parent)
+                # remove raster data downloaded in this run, unless stored
+                if not storeraster and downloaded and os.path.exists(download_dir):
+                    shutil.rmtree(download_dir)
 
         df_data_processed.rename_axis(index=['adm_division', 'year', 'month'], inplace=True)
         df_data_processed.to_csv(processed_data)  # store processed data
@@ -0,0 +1,115 @@
+"""
+Local archive of raster images, indexed by collection, variable, period and grid.
+"""
+import rasterio
+import pandas as pd
+import os
+import shutil
+import logging
+
+INDEX_FILE = 'index.csv'
+INDEX_COLUMNS = ['collection', 'variable', 'datestart', 'dateend', 'grid', 'path']
+KEY_COLUMNS = ['collection', 'variable', 'datestart', 'dateend', 'grid']
+BLOCK_SIZE = 256
+
+
+def load_index(archive):
+    """
+    this function returns the index of the raster archive as a dataframe,
+    with one row per archived (collection, variable, datestart, dateend, grid).
+    If the archive does not exist yet, an empty index is returned.
+    """
+    index_file = os.path.join(archive, INDEX_FILE)
+    if not os.path.exists(index_file):
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    return pd.read_csv(index_file, dtype=str, keep_default_na=False, na_filter=False)
+
+
+def save_index(archive, df_index):
+    """
+    this function writes the index of the raster archive to disk,
+    replacing the old one only once the new one is completely written.
+    """
+    index_file = os.path.join(archive, INDEX_FILE)
+    temp_file = index_file + '.tmp'
+    df_index.to_csv(temp_file, index=False)
+    os.replace(temp_file, index_file)
+
+
+def lookup_raster(archive, collection, variable, datestart, dateend, grid):
+    """
+    this function returns the directory with the archived rasters for the given
+    (collection, variable, datestart, dateend, grid), or None if it is not in the archive.
+    """
+    if archive is None:
+        return None
+    df_index = load_index(archive)
+    match = ((df_index['collection'] == collection) & (df_index['variable'] == variable) &
+             (df_index['datestart'] == datestart) & (df_index['dateend'] == dateend) &
+             (df_index['grid'] == grid))
+    if not match.any():
+        return None
+    raster_dir = os.path.join(archive, df_index[match]['path'].values[0])
+    if not os.path.isdir(raster_dir):
+        logging.warning(f'archived rasters {raster_dir} not found, ignoring index entry')
+        return None
+    return raster_dir
+
+
+def store_raster(archive, raster_dir, collection, variable, datestart, dateend, grid):
+    """
+    this function copies the rasters downloaded in raster_dir to the archive and adds them to the index.
+    Rasters are stored as internally tiled, compressed GeoTIFFs, so that later runs
+    can read (parts of) them directly from disk instead of downloading them again.
+    Returns the directory of the archived rasters, or None if nothing was archived.
+    """
+    if not os.path.isdir(raster_dir):
+        logging.error(f'{raster_dir} not found, not archiving')
+        return None
+    rasters = sorted(file for file in os.listdir(raster_dir) if file.endswith('.tif'))
+    if len(rasters) == 0:
+        logging.error(f'no raster found in {raster_dir}, not archiving')
+        return None
+
+    # one directory per entry, file names are kept since compute_zonalstats relies on them
+    collection_dir = collection.replace('/', '_') + '_' + variable
+    name = '_'.join([variable, datestart, dateend, grid])
+    archive_path = os.path.join(collection_dir, name)
+    archive_dir = os.path.join(archive, archive_path)
+    entry = {'collection': collection,
+             'variable': variable,
+             'datestart': datestart,
+             'dateend': dateend,
+             'grid': grid,
+             'path': archive_path}
+
+    # drop any previous entry with the same key before touching its directory
+    df_index = load_index(archive)
+    same_key = (df_index[KEY_COLUMNS] == pd.Series(entry)[KEY_COLUMNS]).all(axis=1)
+    df_index = df_index[~same_key]
+    if same_key.any():
+        save_index(archive, df_index)
+
+    # write to a temporary sibling directory, move it into place when complete
+    temp_dir = archive_dir + '.tmp'
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    os.makedirs(temp_dir)
+    for raster_file in rasters:
+        with rasterio.open(os.path.join(raster_dir, raster_file)) as src:
+            profile = src.profile.copy()
+            profile.update({"driver": "GTiff",
+                            "tiled": True,
+                            "blockxsize": BLOCK_SIZE,
+                            "blockysize": BLOCK_SIZE,
+                            "compress": "deflate"})
+            with rasterio.open(os.path.join(temp_dir, raster_file), "w", **profile) as dst:
+                dst.write(src.read())
+    if os.path.exists(archive_dir):
+        shutil.rmtree(archive_dir)
+    os.replace(temp_dir, archive_dir)
+
+    # add the new entry only once its rasters are in place
+    df_index = df_index.append(entry, ignore_index=True)
+    save_index(archive, df_index)
+    return archive_dir